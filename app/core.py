@@ -1,14 +1,427 @@
 """
 Core audio extraction module for YouTube URLs.
 """
+import atexit
+import contextlib
+import functools
+import json
+import logging
 import os
 import re
 import shutil
+import string
+import subprocess
 import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
-from yt_dlp import YoutubeDL
+if TYPE_CHECKING:
+    from yt_dlp import YoutubeDL as _YoutubeDLType
+
+# yt-dlp is imported on first use (see _youtube_dl_class), so importing this
+# module -- and with it the web app, CLI and MCP server -- stays cheap.
+YoutubeDL = None
+
+
+def _youtube_dl_class():
+    global YoutubeDL
+    if YoutubeDL is None:
+        from yt_dlp import YoutubeDL as youtube_dl_class
+
+        YoutubeDL = youtube_dl_class
+    return YoutubeDL
+
+
+logger = logging.getLogger("youtube_extractor")
+
+# All per-request work directories live under one root so stale ones can be reaped.
+TMP_ROOT = Path(os.getenv("YT_TMP_ROOT") or tempfile.gettempdir()) / "yt-extract"
+
+# Parallel fragment fetches for segmented (DASH/HLS) formats; plain HTTP
+# formats are unaffected.
+YTDLP_FRAGMENTS = max(1, int(os.getenv("YTDLP_FRAGMENTS", "4")))
+
+# sanitize_filename keeps ASCII letters, digits and " -_.()[]"; every other
+# byte is dropped in one bytes.translate pass.
+_FILENAME_SAFE_CHARS = frozenset(string.ascii_letters + string.digits + " -_.()[]")
+_FILENAME_DELETE_BYTES = bytes(b for b in range(256) if chr(b) not in _FILENAME_SAFE_CHARS)
+
+
+class _YoutubeDLCache:
+    """
+    Per-thread LRU of YoutubeDL instances keyed by their options.
+
+    Building a YoutubeDL loads every extractor and sets up the HTTP opener, so
+    instances are reused across calls. They are not thread-safe, hence one
+    cache per thread. Callers go through session(), which bypasses the cache
+    for option sets with cookies.
+    """
+
+    def __init__(self, maxsize: int = 4):
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances: list["_YoutubeDLType"] = []
+        self._generation = 0
+
+    @staticmethod
+    def _key(ydl_opts: dict) -> str:
+        return json.dumps(ydl_opts, sort_keys=True, default=repr)
+
+    def get(self, ydl_opts: dict) -> "_YoutubeDLType":
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            local.generation = self._generation
+            local.instances = OrderedDict()
+
+        key = self._key(ydl_opts)
+        ydl = local.instances.get(key)
+        if ydl is not None:
+            local.instances.move_to_end(key)
+            return ydl
+
+        ydl = _youtube_dl_class()(ydl_opts)
+        local.instances[key] = ydl
+        with self._lock:
+            self._instances.append(ydl)
+        if len(local.instances) > self.maxsize:
+            _, evicted = local.instances.popitem(last=False)
+            self._close(evicted)
+        return ydl
+
+    @contextlib.contextmanager
+    def session(self, ydl_opts: dict) -> Iterator["_YoutubeDLType"]:
+        """
+        YoutubeDL to use for one call.
+
+        Option sets with cookies get a fresh instance that is closed afterwards:
+        yt-dlp reads the cookie jar once per instance and writes it back on
+        close, so a cached one would ignore a re-exported cookies.txt and later
+        overwrite it with the stale jar.
+        """
+        if "cookiefile" in ydl_opts or "cookiesfrombrowser" in ydl_opts:
+            with _youtube_dl_class()(ydl_opts) as ydl:
+                yield ydl
+        else:
+            yield self.get(ydl_opts)
+
+    def _close(self, ydl: "_YoutubeDLType") -> None:
+        with self._lock:
+            if ydl in self._instances:
+                self._instances.remove(ydl)
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            instances, self._instances = self._instances, []
+            self._generation += 1
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+
+
+_ydl_cache = _YoutubeDLCache()
+atexit.register(_ydl_cache.clear)
+
+
+def ytdlp_cache_dir() -> Optional[Path]:
+    """
+    Shared yt-dlp cache directory (player JS, n-sig solutions) from YTDLP_CACHE.
+
+    None means yt-dlp's own default (~/.cache/yt-dlp), which may be missing or
+    unwritable in containers.
+    """
+    value = os.getenv("YTDLP_CACHE", "").strip()
+    return Path(value).expanduser() if value else None
+
+
+def ensure_tmp_root() -> Path:
+    """
+    Create TMP_ROOT if needed and return it.
+    """
+    TMP_ROOT.mkdir(parents=True, exist_ok=True)
+    return TMP_ROOT
+
+
+def stale_work_dirs(max_age_seconds: float) -> list[Path]:
+    """
+    List work directories under TMP_ROOT not modified for max_age_seconds.
+    """
+    cutoff = time.time() - max_age_seconds
+    stale: list[Path] = []
+    try:
+        with os.scandir(TMP_ROOT) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        stale.append(Path(entry.path))
+                except FileNotFoundError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return stale
+
+
+def _place_file(source: Path, target: Path, link: bool) -> None:
+    """
+    Put the contents of source at target.
+
+    The data goes to a temporary name next to target and is then renamed
+    over it, so an existing target is replaced, never written into: if it is
+    a hard link to another file (e.g. a cache entry), that file is untouched.
+    With link=True a hard link is tried first, falling back to a copy; only
+    use it when neither name will ever be modified in place.
+    """
+    staging = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if link:
+            try:
+                os.link(source, staging)
+            except OSError:
+                shutil.copyfile(source, staging)
+        else:
+            shutil.copyfile(source, staging)
+        os.replace(staging, target)
+    except BaseException:
+        try:
+            os.unlink(staging)
+        except OSError:
+            pass
+        raise
+
+
+_VIDEO_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}")
+_YOUTUBE_HOSTS = ("youtube.com", "youtube-nocookie.com")
+_VIDEO_ID_PATH_PREFIXES = ("shorts", "embed", "live", "v")
+
+
+def youtube_video_id(url: str) -> Optional[str]:
+    """
+    YouTube video id from a watch, youtu.be, shorts, embed or live URL, or None.
+
+    Only YouTube hosts (youtube.com and its subdomains such as m. and music.,
+    youtube-nocookie.com, youtu.be) yield an id, so other sites that use
+    similar URL shapes never share a key with a YouTube video.
+    """
+    parts = urlsplit(str(url))
+    host = (parts.hostname or "").lower()
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if host == "youtu.be":
+        candidate = segments[0] if segments else None
+    elif any(host == domain or host.endswith("." + domain) for domain in _YOUTUBE_HOSTS):
+        candidate = (parse_qs(parts.query).get("v") or [None])[0]
+        if candidate is None and len(segments) >= 2 and segments[0] in _VIDEO_ID_PATH_PREFIXES:
+            candidate = segments[1]
+    else:
+        return None
+    return candidate if candidate and _VIDEO_ID_RE.fullmatch(candidate) else None
+
+
+class _AudioCache:
+    """
+    On-disk LRU of finished audio files, bounded by total size.
+
+    Each entry is a directory <root>/<key>/ holding one file under its
+    download name, so hits keep the title-based filename. Recency survives
+    restarts through the file mtime, which is bumped on every hit. Only
+    directories named like a cache key (or staging dirs) are ever loaded or
+    deleted; anything else under root is left alone.
+    """
+
+    _STAGING_PREFIX = ".put-"
+    _KEY_RE = re.compile(r"[A-Za-z0-9_-]{11}\.(?:mp3|wav|wav-16k)")
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Path, int]]" = OrderedDict()
+        self._total = 0
+        self._load()
+
+    @staticmethod
+    def _entry_file(entry_dir: Path) -> Optional[Path]:
+        try:
+            with os.scandir(entry_dir) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        return Path(entry.path)
+        except OSError:
+            pass
+        return None
+
+    def _load(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        found = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if entry.name.startswith(self._STAGING_PREFIX):
+                    path = None
+                elif self._KEY_RE.fullmatch(entry.name):
+                    path = self._entry_file(Path(entry.path))
+                else:
+                    continue
+                if path is None:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    continue
+                stat = path.stat()
+                found.append((stat.st_mtime, entry.name, path, stat.st_size))
+        for _, key, path, size in sorted(found):
+            self._entries[key] = (path, size)
+            self._total += size
+
+    def get(self, key: str) -> Optional[Path]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            path, size = entry
+            if not path.exists():
+                del self._entries[key]
+                self._total -= size
+                return None
+            self._entries.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, source: Path, name: str, link: bool = False) -> None:
+        staging = Path(tempfile.mkdtemp(prefix=self._STAGING_PREFIX, dir=str(self.root)))
+        evicted: list[Path] = []
+        try:
+            target = staging / name
+            _place_file(source, target, link)
+            size = os.stat(target).st_size
+            entry_dir = self.root / key
+            with self._lock:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._total -= previous[1]
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(staging, entry_dir)
+                self._entries[key] = (entry_dir / name, size)
+                self._total += size
+                while self._total > self.max_bytes and self._entries:
+                    old_key, (_, old_size) = self._entries.popitem(last=False)
+                    self._total -= old_size
+                    evicted.append(self.root / old_key)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        for entry_dir in evicted:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _audio_cache() -> Optional[_AudioCache]:
+    """
+    Process-wide audio cache under YT_AUDIO_CACHE, or None when it is unset.
+
+    Entries live in a dedicated yt-audio subdirectory, so pointing
+    YT_AUDIO_CACHE at a shared directory never touches its other contents.
+    """
+    value = os.getenv("YT_AUDIO_CACHE", "").strip()
+    if not value:
+        return None
+    root = Path(value).expanduser() / "yt-audio"
+    try:
+        max_mb = int(os.getenv("YT_AUDIO_CACHE_MAX_MB", "2048"))
+        return _AudioCache(root, max_mb * 1024 * 1024)
+    except (OSError, ValueError) as e:
+        # Cached like a success, so a bad root or size is reported once and the
+        # process simply runs without the cache.
+        logger.warning("audio_cache.disabled", extra={"ctx": {"path": str(root), "error": str(e)}})
+        return None
+
+
+class AudioStream:
+    """
+    Iterator over a running ffmpeg's stdout, as returned by AudioExtractor.stream_audio.
+
+    close() stops ffmpeg, logs a failed exit and calls on_close; it runs once,
+    whether the stream is exhausted, closed by the consumer, or garbage
+    collected after the consumer went away.
+    """
+
+    def __init__(
+        self,
+        process: subprocess.Popen,
+        stderr_file,
+        first_chunk: bytes,
+        chunk_size: int,
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        self._process = process
+        self._stderr_file = stderr_file
+        self._pending: Optional[bytes] = first_chunk
+        self._chunk_size = chunk_size
+        self._on_close = on_close
+        self._lock = threading.Lock()
+        self._closed = False
+        self._exhausted = False
+
+    def __iter__(self) -> "AudioStream":
+        return self
+
+    def __next__(self) -> bytes:
+        if self._pending is not None:
+            chunk, self._pending = self._pending, None
+            return chunk
+        chunk = b"" if self._closed else self._process.stdout.read(self._chunk_size)
+        if not chunk:
+            self._exhausted = True
+            self.close()
+            raise StopIteration
+        return chunk
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            # At EOF ffmpeg is exiting by itself; only an early close kills it.
+            killed = not self._exhausted and self._process.poll() is None
+            if killed:
+                self._process.kill()
+            returncode = _finish_ffmpeg(self._process)
+            if returncode and not killed:
+                logger.warning(
+                    "stream.ffmpeg_failed",
+                    extra={"ctx": {"returncode": returncode, "error": _ffmpeg_stderr(self._stderr_file)}},
+                )
+        finally:
+            self._stderr_file.close()
+            if self._on_close is not None:
+                self._on_close()
+
+    def __del__(self) -> None:
+        self.close()
+
+
+def _finish_ffmpeg(process: subprocess.Popen) -> int:
+    process.stdout.close()
+    return process.wait()
+
+
+def _ffmpeg_stderr(stderr_file) -> str:
+    # stderr goes to a temp file rather than a pipe, so ffmpeg can never
+    # block on it while stdout is being consumed.
+    stderr_file.seek(0)
+    return stderr_file.read().decode("utf-8", "replace").strip()[-500:]
 
 
 class AudioExtractor:
@@ -16,11 +429,46 @@ class AudioExtractor:
     Core class for extracting audio from YouTube URLs.
     """
 
+    # Static part of every yt-dlp option dict; per-call options are layered on top.
+    BASE_YDL_OPTS = {
+        "quiet": True,
+        "no_warnings": True,
+        "noplaylist": True,
+        "retries": 3,
+        "fragment_retries": 3,
+        # Fetch in 10 MiB ranged requests (also sidesteps YouTube's per-connection
+        # throttling) and start the read buffer at 1 MiB instead of 1 KiB.
+        "http_chunk_size": 10 * 1024 * 1024,
+        "buffersize": 1024 * 1024,
+    }
+
+    # Prefer a source that is already in the target codec, so FFmpegExtractAudio
+    # stream-copies it instead of re-encoding.
+    FORMAT_SELECTORS = {
+        "mp3": "bestaudio[acodec=mp3]/bestaudio/best",
+        "wav": "bestaudio/best",
+    }
+
+    # Streaming hands the source URL to ffmpeg, which reads plain HTTP(S) best.
+    STREAM_FORMAT_SELECTOR = "bestaudio[protocol^=http]/bestaudio/best"
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    # Names derived from the video title: yt-dlp sanitizes and trims them
+    # itself, the same way for downloaded files and streamed downloads.
+    TITLE_FILENAME_OPTS = {
+        "outtmpl": "%(title)s.%(ext)s",
+        "restrictfilenames": True,
+        "windowsfilenames": True,
+        "trim_file_name": 120,
+    }
+
     def __init__(
         self,
         output_dir: Optional[Path] = None,
         cookies_file: Optional[Path] = None,
         cookies_from_browser: Optional[str] = None,
+        wav_low_bitrate: Optional[bool] = None,
+        disposable_output: bool = False,
     ):
         """
         Initialize the audio extractor.
@@ -29,12 +477,17 @@ class AudioExtractor:
             output_dir: Optional directory to save output files. If None, uses temp directory.
             cookies_file: Optional path to a Netscape cookies.txt file.
             cookies_from_browser: Optional browser name for yt-dlp cookiesfrombrowser.
+            wav_low_bitrate: Write WAV as 16 kHz mono 16-bit. If None, uses WAV_LOWBITRATE=1.
+            disposable_output: Files in output_dir are only read and then deleted, so
+                audio cache hits may be hard-linked instead of copied.
             user_agent: Optional custom User-Agent.
             proxy: Optional proxy URL.
         """
         self.output_dir = output_dir
         self.cookies_file = cookies_file
         self.cookies_from_browser = cookies_from_browser
+        self.wav_low_bitrate = wav_low_bitrate
+        self.disposable_output = disposable_output
 
     @staticmethod
     def _resolve_path(value: Optional[str]) -> Optional[Path]:
@@ -60,16 +513,69 @@ class AudioExtractor:
         return options
 
     def _base_ydl_opts(self) -> dict:
-        opts = {
-            "quiet": True,
-            "no_warnings": True,
-            "noplaylist": True,
-            "retries": 3,
-            "fragment_retries": 3,
-        }
+        opts = dict(self.BASE_YDL_OPTS)
+        opts["concurrent_fragment_downloads"] = YTDLP_FRAGMENTS
+        cache_dir = ytdlp_cache_dir()
+        if cache_dir:
+            opts["cachedir"] = str(cache_dir)
         opts.update(self._cookie_options())
         return opts
 
+    def _wav_low_bitrate(self) -> bool:
+        if self.wav_low_bitrate is None:
+            return os.getenv("WAV_LOWBITRATE", "").strip() == "1"
+        return self.wav_low_bitrate
+
+    def _audio_cache_key(self, url: str, audio_format: str) -> Optional[str]:
+        video_id = youtube_video_id(url)
+        if not video_id:
+            return None
+        variant = "wav-16k" if audio_format == "wav" and self._wav_low_bitrate() else audio_format
+        return f"{video_id}.{variant}"
+
+    def _postprocessor_args(self, audio_format: str) -> dict:
+        """
+        Extra ffmpeg arguments for FFmpegExtractAudio.
+
+        HWACCEL (e.g. auto, vaapi, qsv, cuda) is passed to ffmpeg as -hwaccel
+        for the decode stage. Low-bitrate WAV downmixes to 16 kHz mono 16-bit,
+        the usual speech-recognition input, which is about 6x smaller and
+        faster to write than 48 kHz stereo.
+        """
+        args: dict[str, list[str]] = {}
+        hwaccel = os.getenv("HWACCEL", "").strip()
+        if hwaccel:
+            args["extractaudio+ffmpeg_i"] = ["-hwaccel", hwaccel]
+
+        if audio_format == "wav" and self._wav_low_bitrate():
+            args["extractaudio+ffmpeg_o"] = ["-ac", "1", "-ar", "16000", "-sample_fmt", "s16"]
+        return args
+
+    @staticmethod
+    def _download(ydl_opts: dict, url: str, output_dir: Path) -> dict:
+        with _ydl_cache.session(ydl_opts) as ydl:
+            ydl.params["paths"] = {"home": str(output_dir)}
+            return ydl.extract_info(url, download=True)
+
+    @staticmethod
+    def _downloaded_file(info: Optional[dict]) -> Optional[Path]:
+        """
+        Final file reported by yt-dlp for a download, or None if missing or empty.
+
+        Post-processors update "filepath" in place, so this is the converted file;
+        no directory scan is needed.
+        """
+        downloads = (info or {}).get("requested_downloads") or []
+        filepath = downloads[-1].get("filepath") if downloads else None
+        if not filepath:
+            return None
+        try:
+            if os.stat(filepath).st_size == 0:
+                return None
+        except OSError:
+            return None
+        return Path(filepath)
+
     @staticmethod
     def _is_empty_download_error(error: Exception) -> bool:
         return "downloaded file is empty" in str(error).lower()
@@ -85,7 +591,10 @@ class AudioExtractor:
         return updated
 
 
+    # Both helpers below are pure and see the same few inputs over and over, so
+    # they are memoized. lru_cache does not cache raised exceptions.
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def sanitize_filename(name: str, max_len: int = 120) -> str:
         """
         Sanitize a filename to be filesystem-safe.
@@ -97,15 +606,15 @@ class AudioExtractor:
         Returns:
             Sanitized filename
         """
-        name = name.strip()
-        name = re.sub(r"\s+", " ", name)
-        name = re.sub(r"[^a-zA-Z0-9 \-_\.\(\)\[\]]+", "", name)
+        name = " ".join(name.split())
+        name = name.encode("ascii", "ignore").translate(None, _FILENAME_DELETE_BYTES).decode("ascii")
         name = name.strip(" .-_")
         if not name:
             name = "audio"
         return name[:max_len]
 
     @staticmethod
+    @functools.lru_cache(maxsize=64)
     def normalize_audio_format(value: Optional[str]) -> str:
         """
         Normalize and validate audio format.
@@ -153,19 +662,37 @@ class AudioExtractor:
             output_dir.mkdir(parents=True, exist_ok=True)
             use_temp = False
         else:
+            # Not under TMP_ROOT: the caller (CLI, MCP) keeps this file, and the
+            # web service's janitor reaps everything in TMP_ROOT after an hour.
             output_dir = Path(tempfile.mkdtemp(prefix="yt-extract-"))
             use_temp = True
 
         try:
-            # First get metadata (title) without downloading
-            with YoutubeDL(self._base_ydl_opts()) as ydl:
-                info = ydl.extract_info(str(url), download=False)
-
-            title = self.sanitize_filename(info.get("title") or "audio")
+            audio_cache = _audio_cache()
+            cache_key = self._audio_cache_key(url, audio_format) if audio_cache else None
+            # Files handed to callers (output_path, output_dir, CLI/MCP temp
+            # files) may be edited in place, so they never share an inode with
+            # a cache entry; only the web service's throwaway work dirs do.
+            disposable_output = not output_path and self.disposable_output
+
+            if cache_key:
+                cached = audio_cache.get(cache_key)
+                if cached is not None:
+                    output_file = output_path or output_dir / cached.name
+                    try:
+                        _place_file(cached, output_file, link=disposable_output)
+                        return output_file, output_file.name
+                    except OSError:
+                        pass  # evicted in the meantime; download instead
+
+            # The output location is applied per call via "paths" so that the
+            # options, and therefore the cached YoutubeDL, stay the same.
             if output_path:
-                outtmpl = str(output_path)
+                # The caller chose this name: use it verbatim (escaping template
+                # syntax) and don't let yt-dlp trim or rewrite it.
+                name_opts = {"outtmpl": output_path.name.replace("%", "%%"), "restrictfilenames": True}
             else:
-                outtmpl = str(output_dir / f"{title}.%(ext)s")
+                name_opts = self.TITLE_FILENAME_OPTS
 
             postprocessor = {
                 "key": "FFmpegExtractAudio",
@@ -176,22 +703,23 @@ class AudioExtractor:
 
             ydl_opts = {
                 **self._base_ydl_opts(),
-                "format": "bestaudio/best",
-                "outtmpl": outtmpl,
+                "format": self.FORMAT_SELECTORS[audio_format],
+                **name_opts,
                 "postprocessors": [postprocessor],
             }
+            postprocessor_args = self._postprocessor_args(audio_format)
+            if postprocessor_args:
+                ydl_opts["postprocessor_args"] = postprocessor_args
 
             try:
-                with YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([str(url)])
+                info = self._download(ydl_opts, str(url), output_dir)
             except Exception as download_error:
                 if not self._is_empty_download_error(download_error):
                     raise
 
                 retry_opts = self._with_android_player_client(ydl_opts)
                 try:
-                    with YoutubeDL(retry_opts) as ydl:
-                        ydl.download([str(url)])
+                    info = self._download(retry_opts, str(url), output_dir)
                 except Exception as retry_error:
                     raise RuntimeError(
                         "YouTube returned an empty file. This is often caused by bot checks, "
@@ -199,24 +727,21 @@ class AudioExtractor:
                         "or --cookies-file."
                     ) from retry_error
 
-            expected_output = (
-                output_path if output_path else output_dir / f"{title}.{audio_format}"
-            )
-            if expected_output.exists() and expected_output.stat().st_size > 0:
-                filename = expected_output.name
-                return expected_output, filename
-
-            output_file: Optional[Path] = None
-            for p in output_dir.glob(f"*.{audio_format}"):
-                if p.exists() and p.stat().st_size > 0:
-                    output_file = p
-                    break
-
+            output_file = self._downloaded_file(info)
             if not output_file:
                 raise RuntimeError(
                     f"{audio_format.upper()} was not created. Is ffmpeg installed and available on PATH?"
                 )
 
+            if cache_key:
+                # A caller-chosen output name is not a useful download name for
+                # later hits, so those entries are stored under the video id.
+                cache_name = f"{youtube_video_id(url)}.{audio_format}" if output_path else output_file.name
+                try:
+                    audio_cache.put(cache_key, output_file, cache_name, link=disposable_output)
+                except OSError:
+                    pass
+
             filename = output_file.name
             return output_file, filename
 
@@ -227,6 +752,91 @@ class AudioExtractor:
                 raise
             raise RuntimeError(f"Failed to extract audio: {str(e)}") from e
 
+    def _stream_command(self, source: dict, audio_format: str) -> list[str]:
+        postprocessor_args = self._postprocessor_args(audio_format)
+        cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+        headers = source.get("http_headers") or {}
+        if headers:
+            cmd += ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
+        cmd += postprocessor_args.get("extractaudio+ffmpeg_i", [])
+        cmd += ["-i", source["url"], "-vn"]
+        if audio_format == "mp3":
+            cmd += ["-acodec", "libmp3lame", "-b:a", "192k"]
+        else:
+            cmd += ["-acodec", "pcm_s16le"]
+        cmd += postprocessor_args.get("extractaudio+ffmpeg_o", [])
+        cmd += ["-f", audio_format, "pipe:1"]
+        return cmd
+
+    def stream_audio(
+        self, url: str, audio_format: str = "mp3", on_close: Optional[Callable[[], None]] = None
+    ) -> Tuple[AudioStream, str]:
+        """
+        Stream audio from a YouTube URL as it is transcoded.
+
+        The source is resolved and ffmpeg's first chunk is read up front, so
+        bad URLs and ffmpeg failures (403s, undecodable sources) raise before
+        any bytes are sent; the rest of ffmpeg's stdout is yielded in
+        STREAM_CHUNK_SIZE pieces. Nothing is written to disk.
+
+        Args:
+            url: YouTube URL
+            audio_format: Output format ('mp3' or 'wav')
+            on_close: Called once when the returned stream is closed. Not
+                called if this method raises.
+
+        Returns:
+            Tuple of (AudioStream, filename)
+
+        Raises:
+            ValueError: If format is invalid
+            RuntimeError: If ffmpeg is not available, the source cannot be
+                resolved, or ffmpeg produces no audio
+        """
+        audio_format = self.normalize_audio_format(audio_format)
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg is required for streaming. Is ffmpeg installed and available on PATH?")
+
+        ydl_opts = {
+            **self._base_ydl_opts(),
+            "format": self.STREAM_FORMAT_SELECTOR,
+            **self.TITLE_FILENAME_OPTS,
+        }
+        try:
+            with _ydl_cache.session(ydl_opts) as ydl:
+                source = ydl.extract_info(str(url), download=False)
+                # Named like the file endpoints' downloads of the same video.
+                filename = Path(ydl.prepare_filename({**(source or {}), "ext": audio_format})).name
+        except Exception as e:
+            raise RuntimeError(f"Failed to resolve audio source: {str(e)}") from e
+        if not source or not source.get("url"):
+            raise RuntimeError("No streamable audio format found.")
+
+        stderr_file = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(
+                self._stream_command(source, audio_format),
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+            )
+        except BaseException:
+            stderr_file.close()
+            raise
+        try:
+            first_chunk = process.stdout.read(self.STREAM_CHUNK_SIZE)
+        except BaseException:
+            process.kill()
+            _finish_ffmpeg(process)
+            stderr_file.close()
+            raise
+        if not first_chunk:
+            returncode = _finish_ffmpeg(process)
+            error = _ffmpeg_stderr(stderr_file)
+            stderr_file.close()
+            raise RuntimeError(f"ffmpeg produced no audio (exit code {returncode}): {error or 'no output'}")
+
+        return AudioStream(process, stderr_file, first_chunk, self.STREAM_CHUNK_SIZE, on_close), filename
+
     def list_formats(self, url: str) -> list[dict]:
         """
         List available formats for a YouTube URL.
@@ -237,7 +847,7 @@ class AudioExtractor:
         Returns:
             List of format dictionaries from yt-dlp
         """
-        with YoutubeDL(self._base_ydl_opts()) as ydl:
+        with _ydl_cache.session(self._base_ydl_opts()) as ydl:
             info = ydl.extract_info(str(url), download=False)
         return list(info.get("formats") or [])
 
@@ -338,7 +948,7 @@ class AudioExtractor:
             Dict with keys: ok (bool), reason (str), detail (str)
         """
         try:
-            with YoutubeDL(self._base_ydl_opts()) as ydl:
+            with _ydl_cache.session(self._base_ydl_opts()) as ydl:
                 info = ydl.extract_info(str(url), download=False)
             title = info.get("title") if isinstance(info, dict) else None
             return {
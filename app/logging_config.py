@@ -1,17 +1,34 @@
-import json
+import atexit
 import logging
 import os
+import queue
 import sys
-from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import orjson
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp.
+_ts_prefix_cache: Tuple[int, str] = (-1, "")
+
+
+def _utc_timestamp() -> str:
+    # ISO 8601 UTC with microseconds; strftime runs at most once per second.
+    global _ts_prefix_cache
+    secs, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_secs, prefix = _ts_prefix_cache
+    if secs != cached_secs:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(secs))
+        _ts_prefix_cache = (secs, prefix)
+    return f"{prefix}.{nanos // 1000:06d}+00:00"
 
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         payload: Dict[str, Any] = {
-            "ts": datetime.now(timezone.utc).isoformat(),
+            "ts": _utc_timestamp(),
             "level": record.levelname,
             "logger": record.name,
             "msg": record.getMessage(),
@@ -24,7 +41,14 @@ class JsonFormatter(logging.Formatter):
         if record.exc_info:
             payload["exc"] = self.formatException(record.exc_info)
 
-        return json.dumps(payload, ensure_ascii=False)
+        return orjson.dumps(payload, default=str).decode()
+
+
+class _InProcessQueueHandler(QueueHandler):
+    # The queue never leaves the process, so skip QueueHandler's pickling prep
+    # (which would fold exc_info into msg and hide it from JsonFormatter).
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 def setup_logging() -> logging.Logger:
@@ -60,9 +84,10 @@ def setup_logging() -> logging.Logger:
     sh = logging.StreamHandler(sys.stdout)
     sh.setLevel(log_level)
     sh.setFormatter(formatter)
-    logger.addHandler(sh)
+    handlers: list[logging.Handler] = [sh]
 
     # Also log to rotating file.
+    file_logging_error: Optional[Exception] = None
     try:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
@@ -74,10 +99,25 @@ def setup_logging() -> logging.Logger:
         )
         fh.setLevel(log_level)
         fh.setFormatter(formatter)
-        logger.addHandler(fh)
-    except Exception:
+        handlers.append(fh)
+    except Exception as e:
         # If file logging fails (permissions, etc), keep stdout logging.
-        logger.exception("file logging setup failed", extra={"ctx": {"log_file": log_file}})
+        file_logging_error = e
+
+    # Callers only enqueue; a background thread does the stdout/file writes
+    # (and rotation), so request handling never blocks on log I/O.
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(_InProcessQueueHandler(log_queue))
+
+    if file_logging_error is not None:
+        logger.error(
+            "file logging setup failed",
+            exc_info=file_logging_error,
+            extra={"ctx": {"log_file": log_file}},
+        )
 
     # Keep other noisy loggers calmer (optional, but product-friendly).
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -86,23 +126,28 @@ def setup_logging() -> logging.Logger:
     return logger
 
 
-def get_client_id(headers: Dict[str, str]) -> Optional[str]:
+_CLIENT_ID_MAX_LEN = 128
+_API_KEY_PREFIX = "api_key:"
+_API_KEY_TRUNCATED_PREFIX = "api_key:\u2026"
+
+
+def get_client_id(headers: Mapping[str, str]) -> Optional[str]:
     # Product-friendly "who": caller can set X-Client-Id (best) or X-Api-Key (we'll log partially).
     client_id = headers.get("x-client-id")
     if client_id:
-        return client_id[:128]
+        return client_id[:_CLIENT_ID_MAX_LEN]
 
     api_key = headers.get("x-api-key")
-    if api_key:
-        api_key = api_key.strip()
-        if len(api_key) <= 8:
-            return "api_key:" + api_key
-        return "api_key:…" + api_key[-6:]
+    if not api_key:
+        return None
 
-    return None
+    api_key = api_key.strip()
+    if len(api_key) <= 8:
+        return _API_KEY_PREFIX + api_key
+    return _API_KEY_TRUNCATED_PREFIX + api_key[-6:]
 
 
-def get_client_ip(headers: Dict[str, str], fallback_ip: Optional[str]) -> Optional[str]:
+def get_client_ip(headers: Mapping[str, str], fallback_ip: Optional[str]) -> Optional[str]:
     """
     If TRUST_PROXY_HEADERS=1, use X-Forwarded-For / X-Real-IP. Otherwise use fallback_ip.
     """
@@ -1,22 +1,29 @@
+import asyncio
+import contextlib
 import logging
+import os
+import re
 import shutil
 import tempfile
+import threading
 import time
 import uuid
-from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
+from urllib.parse import quote
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi import Form
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, HttpUrl
 from starlette.background import BackgroundTask
 
-from app.core import AudioExtractor
+from app.core import AudioExtractor, ensure_tmp_root, stale_work_dirs, ytdlp_cache_dir
 from app.logging_config import get_client_id, get_client_ip, setup_logging
 
 
@@ -24,11 +31,81 @@ APP_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = APP_DIR / "templates"
 STATIC_DIR = APP_DIR / "static"
 
-app = FastAPI(title="YouTube Audio Extractor", version="1.0.0")
+# Work dirs normally go away after the response; the janitor catches leftovers
+# from crashes or killed workers.
+TMP_MAX_AGE_SECONDS = 3600
+TMP_JANITOR_INTERVAL_SECONDS = 600
+
+logger = setup_logging()
+
+
+async def _reap_stale_tmp_dirs() -> None:
+    removed = 0
+    for path in stale_work_dirs(TMP_MAX_AGE_SECONDS):
+        await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+        removed += 1
+    if removed:
+        logger.info("tmp.reaped", extra={"ctx": {"removed": removed}})
+
+
+async def _tmp_janitor() -> None:
+    while True:
+        await asyncio.sleep(TMP_JANITOR_INTERVAL_SECONDS)
+        try:
+            await _reap_stale_tmp_dirs()
+        except Exception as e:
+            logger.exception("tmp.reap_error", extra={"ctx": {"error": str(e)}})
+
+
+def _prepare_ytdlp_cache() -> None:
+    cache_dir = ytdlp_cache_dir()
+    if not cache_dir:
+        return
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.warning("ytdlp_cache.unavailable", extra={"ctx": {"cache_dir": str(cache_dir), "error": str(e)}})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _prepare_ytdlp_cache()
+    await _reap_stale_tmp_dirs()
+    janitor = asyncio.create_task(_tmp_janitor())
+    try:
+        yield
+    finally:
+        janitor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await janitor
+
+
+app = FastAPI(title="YouTube Audio Extractor", version="1.0.0", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
-logger = setup_logging()
+# Extraction is blocking (network + ffmpeg), so it runs in a bounded worker pool
+# to keep the event loop free. Requests beyond the pool size get a 503.
+EXTRACT_WORKERS = max(1, int(os.getenv("EXTRACT_WORKERS", "3")))
+_extract_pool = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS, thread_name_prefix="extract")
+_extract_slots = threading.BoundedSemaphore(EXTRACT_WORKERS)
+
+# With USE_XACCEL=1 a front proxy (nginx) serves the file: XACCEL_LOCATION must be
+# an internal location aliased to the temp root (see README). The work dir is
+# removed XACCEL_CLEANUP_DELAY_SECONDS after the headers are sent.
+USE_XACCEL = os.getenv("USE_XACCEL") == "1"
+XACCEL_LOCATION = os.getenv("XACCEL_LOCATION", "/_tmp/")
+XACCEL_CLEANUP_DELAY_SECONDS = 30
+
+
+class LargeBlockFileResponse(FileResponse):
+    """
+    FileResponse that reads in 512 KiB blocks instead of Starlette's 64 KiB.
+
+    Servers supporting the ASGI pathsend extension still take the zero-copy path.
+    """
+
+    chunk_size = 512 * 1024
 
 
 class ExtractRequest(BaseModel):
@@ -36,26 +113,34 @@ class ExtractRequest(BaseModel):
     format: Optional[str] = None
 
 
+_URL_BASE_RE = re.compile(r"^(https?://[^/?#]+[^?#]*)")
+_URL_VIDEO_ID_RE = re.compile(r"[?&]v=([A-Za-z0-9_-]+)")
+
+
 def _redact_youtube_url_for_logs(url: str) -> str:
     """
     Log-safe-ish view of the target URL:
     - keep scheme + host + path
     - keep only the 'v' query param when present
     """
-    try:
-        u = urlparse(url)
-        q = parse_qs(u.query)
-        keep = {}
-        if "v" in q and q["v"]:
-            keep["v"] = q["v"][0]
-        new_query = urlencode(keep) if keep else ""
-        return urlunparse((u.scheme, u.netloc, u.path, "", new_query, ""))
-    except Exception:
+    base = _URL_BASE_RE.match(url)
+    if not base:
         return url
+    query = url[base.end():].split("#", 1)[0]
+    video_id = _URL_VIDEO_ID_RE.search(query)
+    if video_id:
+        return f"{base.group(1)}?v={video_id.group(1)}"
+    return base.group(1)
 
 
 def _request_ctx(request: Request) -> dict:
-    headers = {k.lower(): v for k, v in request.headers.items()}
+    # Computed once per request by the middleware; handlers reuse it.
+    return getattr(request.state, "ctx", None) or _compute_ctx(request)
+
+
+def _compute_ctx(request: Request) -> dict:
+    # Starlette headers are already case-insensitive.
+    headers = request.headers
     client_id = get_client_id(headers)
     client_ip = get_client_ip(headers, getattr(request.client, "host", None) if request.client else None)
     ua = headers.get("user-agent")
@@ -76,16 +161,35 @@ def _normalize_audio_format(value: Optional[str]) -> str:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-def _extract_audio_file_response(url: str, *, request: Request, audio_format: str) -> FileResponse:
-    tmp_dir = Path(tempfile.mkdtemp(prefix="yt-extract-"))
+def _schedule_tmp_cleanup(tmp_dir: Path, delay_seconds: float) -> None:
+    timer = threading.Timer(delay_seconds, shutil.rmtree, args=(str(tmp_dir),), kwargs={"ignore_errors": True})
+    timer.daemon = True
+    timer.start()
+
+
+def _xaccel_response(tmp_dir: Path, output_path: Path, download_name: str, media_type: str) -> Response:
+    # tmp_dir sits directly under the temp root that XACCEL_LOCATION aliases.
+    return Response(
+        status_code=200,
+        media_type=media_type,
+        headers={
+            "X-Accel-Redirect": f"{XACCEL_LOCATION}{quote(tmp_dir.name)}/{quote(output_path.name)}",
+            "Content-Disposition": f'attachment; filename="{download_name}"',
+        },
+        background=BackgroundTask(_schedule_tmp_cleanup, tmp_dir, XACCEL_CLEANUP_DELAY_SECONDS),
+    )
+
+
+def _extract_audio_file_response(url: str, *, request: Request, audio_format: str) -> Response:
+    ctx = {**_request_ctx(request), "youtube_url": _redact_youtube_url_for_logs(url)}
+    tmp_dir = Path(tempfile.mkdtemp(prefix="req-", dir=str(ensure_tmp_root())))
 
     try:
         start = time.perf_counter()
-        ctx = _request_ctx(request)
-        ctx["youtube_url"] = _redact_youtube_url_for_logs(url)
         logger.info("extract.start", extra={"ctx": ctx})
 
-        extractor = AudioExtractor(output_dir=tmp_dir)
+        # tmp_dir is deleted once the response is sent.
+        extractor = AudioExtractor(output_dir=tmp_dir, disposable_output=True)
         output_path, download_name = extractor.extract_audio(url, audio_format)
 
         duration_ms = int((time.perf_counter() - start) * 1000)
@@ -94,43 +198,110 @@ def _extract_audio_file_response(url: str, *, request: Request, audio_format: st
             extra={"ctx": {**ctx, "status": "success", "duration_ms": duration_ms, "filename": download_name}},
         )
         media_type = "audio/mpeg" if audio_format == "mp3" else "audio/wav"
-        return FileResponse(
+        if USE_XACCEL:
+            return _xaccel_response(tmp_dir, output_path, download_name, media_type)
+        # Stat here (already off the event loop) so Content-Length is set up front.
+        return LargeBlockFileResponse(
             path=str(output_path),
             media_type=media_type,
             filename=download_name,
+            stat_result=os.stat(output_path),
             background=BackgroundTask(shutil.rmtree, str(tmp_dir), ignore_errors=True),
         )
     except HTTPException:
-        logger.warning("extract.fail", extra={"ctx": {**_request_ctx(request), "status": "failed"}})
+        logger.warning("extract.fail", extra={"ctx": {**ctx, "status": "failed"}})
         shutil.rmtree(tmp_dir, ignore_errors=True)
         raise
     except ValueError as e:
-        logger.warning("extract.fail", extra={"ctx": {**_request_ctx(request), "status": "failed", "error": str(e)}})
+        logger.warning("extract.fail", extra={"ctx": {**ctx, "status": "failed", "error": str(e)}})
         shutil.rmtree(tmp_dir, ignore_errors=True)
         raise HTTPException(status_code=400, detail=str(e))
     except RuntimeError as e:
         logger.exception(
             "extract.error",
-            extra={"ctx": {**_request_ctx(request), "status": "failed", "error": str(e)}},
+            extra={"ctx": {**ctx, "status": "failed", "error": str(e)}},
         )
         shutil.rmtree(tmp_dir, ignore_errors=True)
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         logger.exception(
             "extract.error",
-            extra={"ctx": {**_request_ctx(request), "status": "failed", "error": str(e)}},
+            extra={"ctx": {**ctx, "status": "failed", "error": str(e)}},
         )
         shutil.rmtree(tmp_dir, ignore_errors=True)
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _stream_audio_response(url: str, *, request: Request, audio_format: str) -> Response:
+    ctx = {**_request_ctx(request), "youtube_url": _redact_youtube_url_for_logs(url)}
+    try:
+        logger.info("stream.start", extra={"ctx": ctx})
+        # The caller's extraction slot covers the ffmpeg process, so it is
+        # released when the stream closes rather than when this worker returns.
+        stream, download_name = AudioExtractor().stream_audio(url, audio_format, on_close=_extract_slots.release)
+        logger.info("stream.ready", extra={"ctx": {**ctx, "filename": download_name}})
+    except ValueError as e:
+        logger.warning("stream.fail", extra={"ctx": {**ctx, "status": "failed", "error": str(e)}})
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("stream.error", extra={"ctx": {**ctx, "status": "failed", "error": str(e)}})
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        stream,
+        media_type="audio/mpeg" if audio_format == "mp3" else "audio/wav",
+        headers={"Content-Disposition": f'attachment; filename="{download_name}"'},
+        background=BackgroundTask(stream.close),
+    )
+
+
+def _discard_response(future: Future) -> None:
+    # The request was cancelled, so nobody will send this response or run its
+    # background cleanup (removing the work dir); run that cleanup here.
+    if future.cancelled() or future.exception() is not None:
+        return
+    background = future.result().background
+    if background is not None:
+        background.func(*background.args, **background.kwargs)
+
+
+def _release_slot_if_failed(future: Future) -> None:
+    # A successful stream owns the slot from here on and releases it on close.
+    if future.cancelled() or future.exception() is not None:
+        _extract_slots.release()
+
+
+async def _run_extraction(url: str, *, request: Request, audio_format: str, stream: bool = False) -> Response:
+    if not _extract_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Too many extractions in progress. Try again later.")
+
+    handler = _stream_audio_response if stream else _extract_audio_file_response
+    try:
+        future = _extract_pool.submit(handler, url, request=request, audio_format=audio_format)
+    except Exception:
+        _extract_slots.release()
+        raise
+    # Attached to the worker's own future, so the slot is freed only once the
+    # worker thread is done, even if this request is cancelled first.
+    if stream:
+        future.add_done_callback(_release_slot_if_failed)
+    else:
+        future.add_done_callback(lambda _: _extract_slots.release())
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(_discard_response)
+        raise
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
     request.state.request_id = request_id
 
     start = time.perf_counter()
-    ctx = _request_ctx(request)
+    ctx = _compute_ctx(request)
+    request.state.ctx = ctx
     logger.info("request.start", extra={"ctx": ctx})
 
     try:
@@ -191,18 +362,24 @@ async def health(request: Request):
 async def extract_audio_get(request: Request, url: HttpUrl, format: Optional[str] = None):
     # curl-friendly: GET /api/extract?url=...
     audio_format = _normalize_audio_format(format)
-    return _extract_audio_file_response(str(url), request=request, audio_format=audio_format)
+    return await _run_extraction(str(url), request=request, audio_format=audio_format)
+
+@app.get("/api/extract/stream")
+async def extract_audio_stream(request: Request, url: HttpUrl, format: Optional[str] = None):
+    # Bytes start flowing while ffmpeg is still transcoding; no temp file.
+    audio_format = _normalize_audio_format(format)
+    return await _run_extraction(str(url), request=request, audio_format=audio_format, stream=True)
 
 @app.post("/api/extract")
 async def extract_audio_post(request: Request, payload: ExtractRequest, format: Optional[str] = None):
     # JSON API: { "url": "https://..." }
     audio_format = _normalize_audio_format(payload.format or format)
-    return _extract_audio_file_response(str(payload.url), request=request, audio_format=audio_format)
+    return await _run_extraction(str(payload.url), request=request, audio_format=audio_format)
 
 
 @app.post("/api/extract/form")
 async def extract_audio_form(request: Request, url: HttpUrl = Form(...), format: Optional[str] = Form(None)):
     # Form API: url=<youtube-url>
     audio_format = _normalize_audio_format(format)
-    return _extract_audio_file_response(str(url), request=request, audio_format=audio_format)
+    return await _run_extraction(str(url), request=request, audio_format=audio_format)
 
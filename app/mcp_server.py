@@ -2,113 +2,49 @@
 MCP server for YouTube audio extraction.
 """
 import argparse
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from mcp.server.fastmcp import FastMCP
+from mcp.server.transport_security import TransportSecuritySettings
 
 from app.core import AudioExtractor
 
+mcp = FastMCP("YouTube Audio Extractor", json_response=True)
 
-def create_mcp(host: str, port: int) -> FastMCP:
-    mcp = FastMCP(
-        "YouTube Audio Extractor",
-        json_response=True,
-        host=host,
-        port=port,
+# Extraction blocks on network + ffmpeg; tool calls run it here so concurrent
+# calls overlap instead of queueing on the event loop.
+MCP_WORKERS = max(1, int(os.getenv("MCP_WORKERS", "3")))
+_executor = ThreadPoolExecutor(max_workers=MCP_WORKERS, thread_name_prefix="mcp-extract")
+
+
+@functools.lru_cache(maxsize=8)
+def _get_extractor(
+    cookies_file: Optional[str], cookies_from_browser: Optional[str]
+) -> AudioExtractor:
+    """
+    Return the AudioExtractor shared by tool calls with the same connection options.
+    """
+    return AudioExtractor(
+        cookies_file=Path(cookies_file).expanduser().resolve() if cookies_file else None,
+        cookies_from_browser=cookies_from_browser,
     )
 
-    @mcp.tool()
-    def extract_audio(
-        url: str,
-        format: str = "mp3",
-        output_path: Optional[str] = None,
-        cookies_file: Optional[str] = None,
-        cookies_from_browser: Optional[str] = None,
-    ) -> dict:
-        """
-        Extract audio from a YouTube URL.
-
-        Args:
-            url: YouTube video URL
-            format: Audio format ('mp3' or 'wav'), default is 'mp3'
-            output_path: Optional output file path. If not provided, uses a temporary file.
-
-        Returns:
-            Dictionary with 'success', 'file_path', 'filename', and optional 'error' keys
-        """
-        try:
-            extractor = AudioExtractor(
-                cookies_file=Path(cookies_file).expanduser().resolve()
-                if cookies_file
-                else None,
-                cookies_from_browser=cookies_from_browser,
-            )
-
-            if output_path:
-                output_file = Path(output_path)
-                filename = extractor.extract_audio_to_file(url, output_file, format)
-                return {
-                    "success": True,
-                    "file_path": str(output_file),
-                    "filename": filename,
-                }
-            else:
-                output_file, filename = extractor.extract_audio(url, format)
-                return {
-                    "success": True,
-                    "file_path": str(output_file),
-                    "filename": filename,
-                }
-        except ValueError as e:
-            return {
-                "success": False,
-                "error": f"Invalid input: {str(e)}",
-            }
-        except RuntimeError as e:
-            return {
-                "success": False,
-                "error": f"Extraction failed: {str(e)}",
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Unexpected error: {str(e)}",
-            }
 
-    @mcp.tool()
-    def extract_audio_to_file(
-        url: str,
-        output_path: str,
-        format: str = "mp3",
-        cookies_file: Optional[str] = None,
-        cookies_from_browser: Optional[str] = None,
-    ) -> dict:
-        """
-        Extract audio from a YouTube URL and save to a specific file path.
-
-        Args:
-            url: YouTube video URL
-            output_path: Target output file path
-            format: Audio format ('mp3' or 'wav'), default is 'mp3'
-
-        Returns:
-            Dictionary with 'success', 'file_path', 'filename', and optional 'error' keys
-        """
+def _tool_errors(fn):
+    """
+    Turn an async tool helper's result into {"success": True, ...} and its
+    exceptions into {"success": False, "error": ...}.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> dict:
         try:
-            extractor = AudioExtractor(
-                cookies_file=Path(cookies_file).expanduser().resolve()
-                if cookies_file
-                else None,
-                cookies_from_browser=cookies_from_browser,
-            )
-            output_file = Path(output_path)
-            filename = extractor.extract_audio_to_file(url, output_file, format)
-            return {
-                "success": True,
-                "file_path": str(output_file),
-                "filename": filename,
-            }
+            return {"success": True, **await fn(*args, **kwargs)}
         except ValueError as e:
             return {
                 "success": False,
@@ -125,43 +61,193 @@ def create_mcp(host: str, port: int) -> FastMCP:
                 "error": f"Unexpected error: {str(e)}",
             }
 
-    return mcp
+    return wrapper
 
 
-def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="YouTube Audio Extractor MCP server")
-    parser.add_argument(
-        "--transport",
-        choices=["stdio", "sse"],
-        default="stdio",
-        help="MCP transport to use (default: stdio)",
-    )
-    parser.add_argument(
-        "--host",
-        default="127.0.0.1",
-        help="Bind host for SSE transport (default: 127.0.0.1)",
+def _do_extract(
+    extractor: AudioExtractor,
+    url: str,
+    audio_format: str,
+    output_path: Optional[str],
+) -> dict:
+    if output_path:
+        # The caller's string is already the answer; no Path round-trip.
+        filename = extractor.extract_audio_to_file(url, Path(output_path), audio_format)
+        file_path = output_path
+    else:
+        output_file, filename = extractor.extract_audio(url, audio_format)
+        file_path = str(output_file)
+    return {
+        "file_path": file_path,
+        "filename": filename,
+    }
+
+
+@_tool_errors
+async def _extract_in_executor(
+    url: str,
+    audio_format: str,
+    output_path: Optional[str],
+    cookies_file: Optional[str],
+    cookies_from_browser: Optional[str],
+) -> dict:
+    # Resolved on the event loop thread, so the shared extractor is built once
+    # without needing a lock around the cache.
+    extractor = _get_extractor(cookies_file, cookies_from_browser)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _do_extract, extractor, url, audio_format, output_path)
+
+
+@mcp.tool()
+async def extract_audio(
+    url: str,
+    format: str = "mp3",
+    output_path: Optional[str] = None,
+    cookies_file: Optional[str] = None,
+    cookies_from_browser: Optional[str] = None,
+) -> dict:
+    """
+    Extract audio from a YouTube URL.
+
+    Args:
+        url: YouTube video URL
+        format: Audio format ('mp3' or 'wav'), default is 'mp3'
+        output_path: Optional output file path. If not provided, uses a temporary file.
+
+    Returns:
+        Dictionary with 'success', 'file_path', 'filename', and optional 'error' keys
+    """
+    return await _extract_in_executor(url, format, output_path, cookies_file, cookies_from_browser)
+
+
+@mcp.tool()
+async def extract_audio_to_file(
+    url: str,
+    output_path: str,
+    format: str = "mp3",
+    cookies_file: Optional[str] = None,
+    cookies_from_browser: Optional[str] = None,
+) -> dict:
+    """
+    Extract audio from a YouTube URL and save to a specific file path.
+
+    Args:
+        url: YouTube video URL
+        output_path: Target output file path
+        format: Audio format ('mp3' or 'wav'), default is 'mp3'
+
+    Returns:
+        Dictionary with 'success', 'file_path', 'filename', and optional 'error' keys
+    """
+    return await _extract_in_executor(url, format, output_path, cookies_file, cookies_from_browser)
+
+
+@mcp.tool()
+async def extract_audio_batch(
+    urls: list[str],
+    format: str = "mp3",
+    cookies_file: Optional[str] = None,
+    cookies_from_browser: Optional[str] = None,
+) -> dict:
+    """
+    Extract audio from several YouTube URLs concurrently.
+
+    Args:
+        urls: YouTube video URLs
+        format: Audio format ('mp3' or 'wav'), default is 'mp3'
+
+    Returns:
+        Dictionary with 'results', one extract_audio result per URL in input order
+    """
+    results = await asyncio.gather(
+        *(_extract_in_executor(url, format, None, cookies_file, cookies_from_browser) for url in urls)
     )
-    parser.add_argument(
-        "--port",
-        type=int,
-        default=8000,
-        help="Bind port for SSE transport (default: 8000)",
+    return {"results": list(results)}
+
+
+def _run_stdio(host: str, port: int) -> None:
+    mcp.run()
+
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def _transport_security(host: str) -> Optional[TransportSecuritySettings]:
+    """
+    DNS-rebinding protection for the bind host, as FastMCP's constructor sets it.
+
+    mcp is built at import with the default 127.0.0.1, which locks the allowed
+    Host headers to loopback; a remote bind has to drop that allow-list again.
+    """
+    if host not in _LOOPBACK_HOSTS:
+        return None
+    return TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=["127.0.0.1:*", "localhost:*", "[::1]:*"],
+        allowed_origins=["http://127.0.0.1:*", "http://localhost:*", "http://[::1]:*"],
     )
-    return parser.parse_args(argv)
+
+
+def _http_runner(transport: str) -> Callable[[str, int], None]:
+    def run(host: str, port: int) -> None:
+        # FastMCP takes the bind address from its settings, not from run().
+        mcp.settings.host = host
+        mcp.settings.port = port
+        mcp.settings.transport_security = _transport_security(host)
+        mcp.run(transport=transport)
+
+    return run
+
+
+# Adding a transport is one entry here; the CLI choices follow from it.
+_TRANSPORTS: dict[str, Callable[[str, int], None]] = {
+    "stdio": _run_stdio,
+    "sse": _http_runner("sse"),
+    "streamable-http": _http_runner("streamable-http"),
+}
+
+
+_PARSER = argparse.ArgumentParser(description="YouTube Audio Extractor MCP server")
+_PARSER.add_argument(
+    "--transport",
+    choices=list(_TRANSPORTS),
+    default="stdio",
+    help="MCP transport to use (default: stdio)",
+)
+_PARSER.add_argument(
+    "--host",
+    default="127.0.0.1",
+    help="Bind host for HTTP transports (default: 127.0.0.1)",
+)
+_PARSER.add_argument(
+    "--port",
+    type=int,
+    default=8000,
+    help="Bind port for HTTP transports (default: 8000)",
+)
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    return _PARSER.parse_args(argv)
 
 
 def run_server(transport: str, host: str, port: int) -> None:
-    mcp = create_mcp(host=host, port=port)
-    if transport == "stdio":
-        mcp.run()
-        return
-    if transport == "sse":
-        mcp.run(transport="sse")
+    runner = _TRANSPORTS.get(transport)
+    if runner is None:
+        raise ValueError(f"Unsupported transport: {transport}")
+    runner(host, port)
+
+
+def _install_uvloop() -> None:
+    try:
+        import uvloop
+    except ImportError:
         return
-    raise ValueError(f"Unsupported transport: {transport}")
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
 def main(argv: Optional[list[str]] = None) -> None:
+    _install_uvloop()
     args = _parse_args(argv)
     run_server(args.transport, args.host, args.port)
 
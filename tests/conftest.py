@@ -0,0 +1,14 @@
+"""
+Shared pytest fixtures.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the whole session; the app lifespan runs once."""
+    with TestClient(app) as test_client:
+        yield test_client
@@ -1,12 +1,20 @@
 """
 API tests for the FastAPI service.
 """
+import asyncio
+import shutil
+import threading
+import time
 from pathlib import Path
 from unittest.mock import patch
 
-from fastapi.testclient import TestClient
+import pytest
+from fastapi.responses import Response
+from starlette.background import BackgroundTask
 
-from app.main import app
+import app.main as main_module
+from app.core import AudioExtractor
+from app.main import _redact_youtube_url_for_logs
 
 TEST_URL = "https://www.youtube.com/watch?v=WRvWLWfv4Ts"
 
@@ -16,50 +24,58 @@ def _write_audio_file(path: Path) -> Path:
     return path
 
 
-def test_health():
-    client = TestClient(app)
+def test_health(client):
     response = client.get("/api/health")
     assert response.status_code == 200
     assert response.json()["ok"] is True
 
 
-def test_extract_get_success(tmp_path):
-    audio_file = _write_audio_file(tmp_path / "Test Title.mp3")
+def test_request_ctx_computed_once(client):
+    with patch("app.main._compute_ctx", wraps=main_module._compute_ctx) as mock_compute:
+        response = client.get("/api/health", headers={"X-Client-Id": "my-cli"})
+
+    assert response.status_code == 200
+    mock_compute.assert_called_once()
+
+
+def test_extract_get_success(client, tmp_path):
+    audio_file = _write_audio_file(tmp_path / "Test_Title.mp3")
 
     with patch("app.main.tempfile.mkdtemp", return_value=str(tmp_path)), patch(
         "app.main.AudioExtractor"
     ) as mock_extractor:
-        mock_extractor.return_value.extract_audio.return_value = (audio_file, "Test Title.mp3")
-        client = TestClient(app)
+        mock_extractor.normalize_audio_format = AudioExtractor.normalize_audio_format
+        mock_extractor.return_value.extract_audio.return_value = (audio_file, "Test_Title.mp3")
         response = client.get("/api/extract", params={"url": TEST_URL, "format": "mp3"})
 
     assert response.status_code == 200
     assert response.headers["content-type"].startswith("audio/mpeg")
-    assert "Test Title.mp3" in response.headers.get("content-disposition", "")
+    assert "Test_Title.mp3" in response.headers.get("content-disposition", "")
+    assert response.headers["content-length"] == str(len(b"audio-bytes"))
 
 
-def test_extract_post_json_success(tmp_path):
+def test_extract_post_json_success(client, tmp_path):
     audio_file = _write_audio_file(tmp_path / "Test Title.wav")
 
     with patch("app.main.tempfile.mkdtemp", return_value=str(tmp_path)), patch(
         "app.main.AudioExtractor"
     ) as mock_extractor:
+        mock_extractor.normalize_audio_format = AudioExtractor.normalize_audio_format
         mock_extractor.return_value.extract_audio.return_value = (audio_file, "Test Title.wav")
-        client = TestClient(app)
         response = client.post("/api/extract", json={"url": TEST_URL, "format": "wav"})
 
     assert response.status_code == 200
     assert response.headers["content-type"].startswith("audio/wav")
 
 
-def test_extract_form_success(tmp_path):
+def test_extract_form_success(client, tmp_path):
     audio_file = _write_audio_file(tmp_path / "Test Title.mp3")
 
     with patch("app.main.tempfile.mkdtemp", return_value=str(tmp_path)), patch(
         "app.main.AudioExtractor"
     ) as mock_extractor:
+        mock_extractor.normalize_audio_format = AudioExtractor.normalize_audio_format
         mock_extractor.return_value.extract_audio.return_value = (audio_file, "Test Title.mp3")
-        client = TestClient(app)
         response = client.post(
             "/api/extract/form",
             data={"url": TEST_URL, "format": "mp3"},
@@ -69,8 +85,138 @@ def test_extract_form_success(tmp_path):
     assert response.headers["content-type"].startswith("audio/mpeg")
 
 
-def test_extract_invalid_format():
-    client = TestClient(app)
+def test_extract_invalid_format(client):
     response = client.get("/api/extract", params={"url": TEST_URL, "format": "ogg"})
     assert response.status_code == 400
     assert "Format must be either" in response.json()["detail"]
+
+
+def test_extract_xaccel_redirect(client, tmp_path):
+    work_dir = tmp_path / "req-abc"
+    work_dir.mkdir()
+    audio_file = _write_audio_file(work_dir / "Test_Title.mp3")
+
+    with patch("app.main.USE_XACCEL", True), patch(
+        "app.main.tempfile.mkdtemp", return_value=str(work_dir)
+    ), patch("app.main._schedule_tmp_cleanup") as mock_cleanup, patch(
+        "app.main.AudioExtractor"
+    ) as mock_extractor:
+        mock_extractor.normalize_audio_format = AudioExtractor.normalize_audio_format
+        mock_extractor.return_value.extract_audio.return_value = (audio_file, "Test_Title.mp3")
+        response = client.get("/api/extract", params={"url": TEST_URL, "format": "mp3"})
+
+    assert response.status_code == 200
+    assert response.headers["x-accel-redirect"] == "/_tmp/req-abc/Test_Title.mp3"
+    assert response.headers["content-type"].startswith("audio/mpeg")
+    assert "Test_Title.mp3" in response.headers["content-disposition"]
+    assert response.content == b""
+    mock_cleanup.assert_called_once()
+
+
+class _FakeStream:
+    def __init__(self, chunks, on_close):
+        self._chunks = iter(chunks)
+        self._on_close = on_close
+        self.closed = False
+
+    def __iter__(self):
+        return self._chunks
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._on_close()
+
+
+def test_extract_stream(client):
+    slots = threading.BoundedSemaphore(1)
+    streams = []
+
+    def stream_audio(url, audio_format, on_close):
+        assert not slots.acquire(blocking=False)
+        streams.append(_FakeStream([b"audio-", b"bytes"], on_close))
+        return streams[-1], "Test_Title.mp3"
+
+    with patch("app.main._extract_slots", slots), patch("app.main.AudioExtractor") as mock_extractor:
+        mock_extractor.normalize_audio_format = AudioExtractor.normalize_audio_format
+        mock_extractor.return_value.stream_audio.side_effect = stream_audio
+        response = client.get("/api/extract/stream", params={"url": TEST_URL, "format": "mp3"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("audio/mpeg")
+        assert "Test_Title.mp3" in response.headers["content-disposition"]
+        assert response.content == b"audio-bytes"
+        # Closing the finished stream handed its slot back.
+        assert streams[0].closed
+        assert slots.acquire(blocking=False)
+
+
+def test_extract_stream_busy_returns_503(client):
+    with patch("app.main._extract_slots") as mock_slots, patch("app.main.AudioExtractor") as mock_extractor:
+        mock_slots.acquire.return_value = False
+        mock_extractor.normalize_audio_format = AudioExtractor.normalize_audio_format
+        response = client.get("/api/extract/stream", params={"url": TEST_URL, "format": "mp3"})
+
+    assert response.status_code == 503
+    assert not mock_extractor.return_value.stream_audio.called
+
+
+def test_extract_stream_failure_releases_slot(client):
+    slots = threading.BoundedSemaphore(1)
+
+    with patch("app.main._extract_slots", slots), patch("app.main.AudioExtractor") as mock_extractor:
+        mock_extractor.normalize_audio_format = AudioExtractor.normalize_audio_format
+        mock_extractor.return_value.stream_audio.side_effect = RuntimeError("ffmpeg produced no audio")
+        response = client.get("/api/extract/stream", params={"url": TEST_URL, "format": "mp3"})
+
+        assert response.status_code == 500
+        assert slots.acquire(blocking=False)
+
+
+def test_extract_busy_returns_503(client):
+    with patch("app.main._extract_slots") as mock_slots:
+        mock_slots.acquire.return_value = False
+        response = client.get("/api/extract", params={"url": TEST_URL, "format": "mp3"})
+
+    assert response.status_code == 503
+
+
+def test_cancelled_extraction_holds_slot_until_worker_finishes(tmp_path):
+    work_dir = tmp_path / "req-abc"
+    work_dir.mkdir()
+    started = threading.Event()
+    finish = threading.Event()
+    slots = threading.BoundedSemaphore(1)
+
+    def slow_response(url, *, request, audio_format):
+        started.set()
+        finish.wait(5)
+        return Response(background=BackgroundTask(shutil.rmtree, str(work_dir), ignore_errors=True))
+
+    async def cancel_while_running():
+        task = asyncio.create_task(main_module._run_extraction(TEST_URL, request=None, audio_format="mp3"))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The worker is still busy, so its slot must still be taken.
+        assert not slots.acquire(blocking=False)
+
+    with patch("app.main._extract_audio_file_response", slow_response), patch("app.main._extract_slots", slots):
+        asyncio.run(cancel_while_running())
+        finish.set()
+        deadline = time.monotonic() + 5
+        while not slots.acquire(blocking=False):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        # The discarded response's cleanup still runs.
+        while work_dir.exists():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+
+def test_redact_youtube_url_for_logs():
+    assert _redact_youtube_url_for_logs(TEST_URL + "&list=PL123&t=42#frag") == TEST_URL
+    assert _redact_youtube_url_for_logs("https://youtu.be/WRvWLWfv4Ts?si=secret") == "https://youtu.be/WRvWLWfv4Ts"
+    assert _redact_youtube_url_for_logs("https://www.youtube.com/watch#?v=abc") == "https://www.youtube.com/watch"
+    assert _redact_youtube_url_for_logs("not a url") == "not a url"
@@ -1,13 +1,54 @@
 """
 Unit tests for the core audio extraction module.
 """
+import io
+import os
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from app.core import AudioExtractor
+from app.core import (
+    AudioExtractor,
+    _audio_cache,
+    _AudioCache,
+    _ydl_cache,
+    stale_work_dirs,
+    youtube_video_id,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clear_ydl_cache():
+    _ydl_cache.clear()
+    yield
+    _ydl_cache.clear()
+
+
+def _mock_ydl(mock_ydl_class) -> MagicMock:
+    mock_ydl = MagicMock()
+    mock_ydl.params = {}
+
+    def prepare_filename(info):
+        from yt_dlp import YoutubeDL as RealYoutubeDL
+
+        return RealYoutubeDL(mock_ydl_class.call_args[0][0]).prepare_filename(info)
+
+    mock_ydl.prepare_filename.side_effect = prepare_filename
+    mock_ydl_class.return_value = mock_ydl
+    return mock_ydl
+
+
+def _simulate_download(mock_ydl, output_file: Path) -> None:
+    """Make the mocked YoutubeDL write output_file and report it as the final download."""
+
+    def extract_info(url, download=True):
+        output_file.write_bytes(b"audio-bytes")
+        return {"title": "Test Video", "requested_downloads": [{"filepath": str(output_file)}]}
+
+    mock_ydl.extract_info.side_effect = extract_info
 
 
 class TestAudioExtractor:
@@ -40,54 +81,162 @@ class TestAudioExtractor:
     @patch("app.core.YoutubeDL")
     def test_extract_audio_success(self, mock_ydl_class):
         """Test successful audio extraction."""
-        mock_ydl = MagicMock()
-        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
-
-        mock_info = {"title": "Test Video"}
-        mock_ydl.extract_info.return_value = mock_info
-        mock_ydl.download.return_value = None
+        mock_ydl = _mock_ydl(mock_ydl_class)
 
         with tempfile.TemporaryDirectory() as tmpdir:
             extractor = AudioExtractor(output_dir=Path(tmpdir))
+            mock_output_file = Path(tmpdir) / "Test_Video.mp3"
+            _simulate_download(mock_ydl, mock_output_file)
 
-            with patch("pathlib.Path.glob") as mock_glob:
-                mock_output_file = Path(tmpdir) / "Test Video.mp3"
-                mock_output_file.touch()
-                mock_glob.return_value = [mock_output_file]
-
-                output_path, filename = extractor.extract_audio("https://youtube.com/watch?v=test", "mp3")
+            output_path, filename = extractor.extract_audio("https://youtube.com/watch?v=test", "mp3")
 
-                assert output_path == mock_output_file
-                assert filename == "Test Video.mp3"
-                assert mock_ydl.extract_info.called
-                assert mock_ydl.download.called
+            assert output_path == mock_output_file
+            assert filename == "Test_Video.mp3"
+            mock_ydl.extract_info.assert_called_once_with(
+                "https://youtube.com/watch?v=test", download=True
+            )
+            assert not mock_ydl.download.called
 
     @patch("app.core.tempfile.mkdtemp")
     @patch("app.core.YoutubeDL")
-    def test_extract_audio_uses_output_dir(self, mock_ydl_class, mock_mkdtemp):
+    def test_extract_audio_uses_output_dir(self, mock_ydl_class, mock_mkdtemp, tmp_path):
         """Test that output_dir is used when provided."""
-        mock_ydl = MagicMock()
-        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
-
-        mock_info = {"title": "Test Video"}
-        mock_ydl.extract_info.return_value = mock_info
-        mock_ydl.download.return_value = None
+        mock_ydl = _mock_ydl(mock_ydl_class)
 
         mock_mkdtemp.side_effect = AssertionError("tempfile.mkdtemp should not be called")
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output_dir = Path(tmpdir)
-            extractor = AudioExtractor(output_dir=output_dir)
+        output_dir = tmp_path
+        extractor = AudioExtractor(output_dir=output_dir)
+        mock_output_file = output_dir / "Test_Video.mp3"
+        _simulate_download(mock_ydl, mock_output_file)
+
+        output_path, filename = extractor.extract_audio("https://youtube.com/watch?v=test", "mp3")
+
+        assert output_path == mock_output_file
+        assert filename == "Test_Video.mp3"
+        ydl_opts = mock_ydl_class.call_args[0][0]
+        assert ydl_opts["outtmpl"] == "%(title)s.%(ext)s"
+        assert ydl_opts["restrictfilenames"] is True
+        assert ydl_opts["trim_file_name"] == 120
+        assert ydl_opts["http_chunk_size"] == 10 * 1024 * 1024
+        assert mock_ydl.params["paths"] == {"home": str(output_dir)}
+
+    @patch("app.core.YoutubeDL")
+    def test_extract_audio_temp_output_outside_tmp_root(self, mock_ydl_class, tmp_path, monkeypatch):
+        """Test that caller-kept temp outputs are not created in the reaped TMP_ROOT."""
+        monkeypatch.setattr("app.core.TMP_ROOT", tmp_path / "reaped")
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "system"))
+        (tmp_path / "system").mkdir()
+        mock_ydl = _mock_ydl(mock_ydl_class)
+
+        def extract_info(url, download=True):
+            output_file = Path(mock_ydl.params["paths"]["home"]) / "Test_Video.mp3"
+            output_file.write_bytes(b"audio-bytes")
+            return {"requested_downloads": [{"filepath": str(output_file)}]}
+
+        mock_ydl.extract_info.side_effect = extract_info
+
+        output_path, _ = AudioExtractor().extract_audio("https://youtube.com/watch?v=test", "mp3")
+
+        assert output_path.parent.parent == tmp_path / "system"
+        assert not (tmp_path / "reaped").exists()
+
+    @patch("app.core.YoutubeDL")
+    def test_extract_audio_reuses_youtubedl(self, mock_ydl_class, tmp_path):
+        """Test that repeated extractions share one YoutubeDL instance."""
+        mock_ydl = _mock_ydl(mock_ydl_class)
+        _simulate_download(mock_ydl, tmp_path / "Test_Video.mp3")
+
+        extractor = AudioExtractor(output_dir=tmp_path)
+        extractor.extract_audio("https://youtube.com/watch?v=test", "mp3")
+        extractor.extract_audio("https://youtube.com/watch?v=test", "mp3")
+
+        assert mock_ydl_class.call_count == 1
+        assert mock_ydl.extract_info.call_count == 2
+
+    def test_cookie_sessions_see_reexported_cookies(self, tmp_path):
+        """Test that a re-exported cookies.txt is picked up and never overwritten with a stale jar."""
+        cookie_file = tmp_path / "cookies.txt"
+
+        def write_cookie(value):
+            cookie_file.write_text(
+                "# Netscape HTTP Cookie File\n"
+                f".youtube.com\tTRUE\t/\tTRUE\t2000000000\tSID\t{value}\n"
+            )
+
+        def sid():
+            with _ydl_cache.session(AudioExtractor(cookies_file=cookie_file)._base_ydl_opts()) as ydl:
+                return {cookie.name: cookie.value for cookie in ydl.cookiejar}["SID"]
+
+        write_cookie("OLD")
+        assert sid() == "OLD"
+        write_cookie("FRESH")
+        assert sid() == "FRESH"
+        _ydl_cache.clear()
+        assert "SID\tFRESH" in cookie_file.read_text()
+
+    @patch("app.core.YoutubeDL")
+    def test_metadata_calls_reuse_youtubedl(self, mock_ydl_class):
+        """Test that list_formats and diagnose_access share one cached YoutubeDL."""
+        mock_ydl = _mock_ydl(mock_ydl_class)
+        mock_ydl.extract_info.return_value = {"title": "Test Video", "formats": [{"format_id": "140"}]}
+        extractor = AudioExtractor()
+
+        assert extractor.list_formats("https://youtube.com/watch?v=test") == [{"format_id": "140"}]
+        assert extractor.diagnose_access("https://youtube.com/watch?v=test")["ok"] is True
+
+        assert mock_ydl_class.call_count == 1
+        assert not mock_ydl.__enter__.called
+
+    @patch("app.core.YoutubeDL")
+    def test_extract_audio_hwaccel(self, mock_ydl_class, tmp_path, monkeypatch):
+        """Test that HWACCEL is forwarded to ffmpeg as an input option."""
+        monkeypatch.setenv("HWACCEL", "vaapi")
+        mock_ydl = _mock_ydl(mock_ydl_class)
+        _simulate_download(mock_ydl, tmp_path / "Test_Video.mp3")
+
+        AudioExtractor(output_dir=tmp_path).extract_audio("https://youtube.com/watch?v=test", "mp3")
+
+        ydl_opts = mock_ydl_class.call_args[0][0]
+        assert ydl_opts["postprocessor_args"] == {"extractaudio+ffmpeg_i": ["-hwaccel", "vaapi"]}
+        assert ydl_opts["format"].startswith("bestaudio[acodec=mp3]")
+
+    @patch("app.core.YoutubeDL")
+    def test_extract_audio_missing_output(self, mock_ydl_class, tmp_path):
+        """Test that a download without a reported file is an error."""
+        mock_ydl = _mock_ydl(mock_ydl_class)
+        mock_ydl.extract_info.return_value = {"title": "Test Video", "requested_downloads": []}
+
+        with pytest.raises(RuntimeError, match="MP3 was not created"):
+            AudioExtractor(output_dir=tmp_path).extract_audio("https://youtube.com/watch?v=test", "mp3")
+
+    def test_wav_low_bitrate_args(self, monkeypatch):
+        """Test that low-bitrate WAV adds 16 kHz mono output args only for WAV."""
+        monkeypatch.delenv("HWACCEL", raising=False)
+        monkeypatch.delenv("WAV_LOWBITRATE", raising=False)
+        low = ["-ac", "1", "-ar", "16000", "-sample_fmt", "s16"]
 
-            with patch("pathlib.Path.glob") as mock_glob:
-                mock_output_file = output_dir / "Test Video.mp3"
-                mock_output_file.touch()
-                mock_glob.return_value = [mock_output_file]
+        assert AudioExtractor(wav_low_bitrate=True)._postprocessor_args("wav") == {"extractaudio+ffmpeg_o": low}
+        assert AudioExtractor(wav_low_bitrate=True)._postprocessor_args("mp3") == {}
+        assert AudioExtractor()._postprocessor_args("wav") == {}
 
-                output_path, filename = extractor.extract_audio("https://youtube.com/watch?v=test", "mp3")
+        monkeypatch.setenv("WAV_LOWBITRATE", "1")
+        assert AudioExtractor()._postprocessor_args("wav") == {"extractaudio+ffmpeg_o": low}
 
-                assert output_path == mock_output_file
-                assert filename == "Test Video.mp3"
+    def test_ytdlp_cache_dir_option(self, tmp_path, monkeypatch):
+        """Test that YTDLP_CACHE is passed to yt-dlp as cachedir."""
+        monkeypatch.setenv("YTDLP_CACHE", str(tmp_path))
+        assert AudioExtractor()._base_ydl_opts()["cachedir"] == str(tmp_path)
+
+        monkeypatch.delenv("YTDLP_CACHE")
+        assert "cachedir" not in AudioExtractor()._base_ydl_opts()
+
+    def test_concurrent_fragments_option(self, monkeypatch):
+        """Test YTDLP_FRAGMENTS sets concurrent fragment downloads."""
+        assert AudioExtractor()._base_ydl_opts()["concurrent_fragment_downloads"] == 4
+
+        monkeypatch.setattr("app.core.YTDLP_FRAGMENTS", 8)
+        assert AudioExtractor()._base_ydl_opts()["concurrent_fragment_downloads"] == 8
 
     @patch("app.core.YoutubeDL")
     def test_extract_audio_invalid_format(self, mock_ydl_class):
@@ -97,30 +246,245 @@ class TestAudioExtractor:
         with pytest.raises(ValueError, match="Format must be either"):
             extractor.extract_audio("https://youtube.com/watch?v=test", "ogg")
 
+    @patch("app.core.subprocess.Popen")
+    @patch("app.core.shutil.which", return_value="/usr/bin/ffmpeg")
+    @patch("app.core.YoutubeDL")
+    def test_stream_audio(self, mock_ydl_class, mock_which, mock_popen):
+        """Test streaming pipes ffmpeg stdout for the resolved source URL."""
+        mock_ydl = _mock_ydl(mock_ydl_class)
+        mock_ydl.extract_info.return_value = {
+            "title": "Test Video",
+            "url": "https://media.example/audio",
+            "http_headers": {"User-Agent": "ua"},
+        }
+        process = mock_popen.return_value
+        process.stdout = io.BytesIO(b"a" * (AudioExtractor.STREAM_CHUNK_SIZE + 10))
+        process.poll.return_value = 0
+        process.wait.return_value = 0
+        on_close = MagicMock()
+
+        stream, filename = AudioExtractor().stream_audio(
+            "https://youtube.com/watch?v=test", "mp3", on_close=on_close
+        )
+
+        # Same name as the file endpoints' download of this video.
+        assert filename == "Test_Video.mp3"
+        assert [len(chunk) for chunk in stream] == [AudioExtractor.STREAM_CHUNK_SIZE, 10]
+        mock_ydl.extract_info.assert_called_once_with("https://youtube.com/watch?v=test", download=False)
+        cmd = mock_popen.call_args.args[0]
+        assert cmd[cmd.index("-i") + 1] == "https://media.example/audio"
+        assert cmd[cmd.index("-headers") + 1] == "User-Agent: ua\r\n"
+        assert cmd[-3:] == ["-f", "mp3", "pipe:1"]
+        process.wait.assert_called_once()
+        stream.close()
+        on_close.assert_called_once_with()
+
+    @patch("app.core.subprocess.Popen")
+    @patch("app.core.shutil.which", return_value="/usr/bin/ffmpeg")
+    @patch("app.core.YoutubeDL")
+    def test_stream_audio_ffmpeg_fails_before_output(self, mock_ydl_class, mock_which, mock_popen):
+        """Test an ffmpeg failure before the first chunk raises instead of streaming nothing."""
+        mock_ydl = _mock_ydl(mock_ydl_class)
+        mock_ydl.extract_info.return_value = {"title": "Test Video", "url": "https://media.example/audio"}
+
+        def popen(cmd, stdout, stderr):
+            stderr.write(b"HTTP error 403 Forbidden")
+            process = MagicMock()
+            process.stdout = io.BytesIO(b"")
+            process.wait.return_value = 1
+            return process
+
+        mock_popen.side_effect = popen
+        on_close = MagicMock()
+
+        with pytest.raises(RuntimeError, match="exit code 1.*403 Forbidden"):
+            AudioExtractor().stream_audio("https://youtube.com/watch?v=test", "mp3", on_close=on_close)
+        assert not on_close.called
+
+    @patch("app.core.YoutubeDL")
+    def test_extract_audio_served_from_audio_cache(self, mock_ydl_class, tmp_path, monkeypatch):
+        """Test that a repeat request for the same video and format skips yt-dlp."""
+        monkeypatch.setenv("YT_AUDIO_CACHE", str(tmp_path / "cache"))
+        _audio_cache.cache_clear()
+        try:
+            mock_ydl = _mock_ydl(mock_ydl_class)
+            first_dir = tmp_path / "work" / "req-1"
+            _simulate_download(mock_ydl, first_dir / "Test_Video.mp3")
+            AudioExtractor(output_dir=first_dir, disposable_output=True).extract_audio(
+                "https://youtu.be/WRvWLWfv4Ts", "mp3"
+            )
+
+            second_dir = tmp_path / "work" / "req-2"
+            output_path, filename = AudioExtractor(output_dir=second_dir, disposable_output=True).extract_audio(
+                "https://www.youtube.com/watch?v=WRvWLWfv4Ts&t=5", "mp3"
+            )
+
+            assert mock_ydl.extract_info.call_count == 1
+            assert output_path == second_dir / "Test_Video.mp3"
+            assert filename == "Test_Video.mp3"
+            assert output_path.read_bytes() == b"audio-bytes"
+            # Disposable outputs are throwaway, so the hit is a hard link rather than a copy.
+            assert output_path.stat().st_nlink > 1
+
+            # Files handed to callers never share an inode with the cache.
+            caller_dir = tmp_path / "caller"
+            output_path, _ = AudioExtractor(output_dir=caller_dir).extract_audio(
+                "https://youtu.be/WRvWLWfv4Ts", "mp3"
+            )
+            assert output_path.read_bytes() == b"audio-bytes"
+            assert output_path.stat().st_nlink == 1
+        finally:
+            _audio_cache.cache_clear()
+
+    @patch("app.core.YoutubeDL")
+    def test_audio_cache_hit_does_not_overwrite_shared_file(self, mock_ydl_class, tmp_path, monkeypatch):
+        """Test that reusing an output path for another cached video leaves the cache intact."""
+        monkeypatch.setenv("YT_AUDIO_CACHE", str(tmp_path / "cache"))
+        _audio_cache.cache_clear()
+        try:
+            mock_ydl = _mock_ydl(mock_ydl_class)
+
+            def extract_info(url, download=True):
+                output_file = Path(mock_ydl.params["paths"]["home"]) / mock_ydl_class.call_args[0][0]["outtmpl"]
+                output_file.write_bytes(url[-11:].encode())
+                return {"requested_downloads": [{"filepath": str(output_file)}]}
+
+            mock_ydl.extract_info.side_effect = extract_info
+            extractor = AudioExtractor()
+            song = tmp_path / "out" / "song.mp3"
+            video_a = "https://youtu.be/AAAAAAAAAAA"
+            video_b = "https://youtu.be/BBBBBBBBBBB"
+
+            extractor.extract_audio_to_file(video_b, tmp_path / "out" / "b.mp3", "mp3")
+            extractor.extract_audio_to_file(video_a, song, "mp3")
+            extractor.extract_audio_to_file(video_b, song, "mp3")
+            song.write_bytes(b"edited in place")
+            extractor.extract_audio_to_file(video_a, tmp_path / "out" / "a.mp3", "mp3")
+
+            assert mock_ydl.extract_info.call_count == 2
+            assert (tmp_path / "out" / "a.mp3").read_bytes() == b"AAAAAAAAAAA"
+        finally:
+            _audio_cache.cache_clear()
+
     @patch("app.core.YoutubeDL")
     def test_extract_audio_to_file(self, mock_ydl_class):
         """Test extracting audio to a specific file path."""
-        mock_ydl = MagicMock()
-        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
-
-        mock_info = {"title": "Test Video"}
-        mock_ydl.extract_info.return_value = mock_info
-        mock_ydl.download.return_value = None
+        mock_ydl = _mock_ydl(mock_ydl_class)
 
         with tempfile.TemporaryDirectory() as tmpdir:
             extractor = AudioExtractor()
             output_file = Path(tmpdir) / "output.mp3"
-            output_file.touch()
+            _simulate_download(mock_ydl, output_file)
+
+            filename = extractor.extract_audio_to_file(
+                "https://youtube.com/watch?v=test", output_file, "mp3"
+            )
+
+            assert filename == "output.mp3"
+            assert output_file.exists()
 
-            with patch("pathlib.Path.glob") as mock_glob:
-                mock_glob.return_value = [output_file]
+    @patch("app.core.YoutubeDL")
+    def test_extract_audio_to_file_keeps_long_caller_name(self, mock_ydl_class, tmp_path):
+        """Test that yt-dlp is not asked to trim or rewrite a caller-chosen file name."""
+        from yt_dlp import YoutubeDL as RealYoutubeDL
+
+        mock_ydl = _mock_ydl(mock_ydl_class)
+        output_file = tmp_path / ("x" * 126 + "%(id)s.mp3")
+        _simulate_download(mock_ydl, output_file)
+
+        AudioExtractor().extract_audio_to_file("https://youtube.com/watch?v=test", output_file, "mp3")
+
+        ydl_opts = mock_ydl_class.call_args[0][0]
+        assert "trim_file_name" not in ydl_opts
+        assert "windowsfilenames" not in ydl_opts
+        prepared = RealYoutubeDL(ydl_opts).prepare_filename({"id": "abc", "title": "T", "ext": "mp3"})
+        assert Path(prepared).name == output_file.name
+
+
+class TestAudioCache:
+    """Test cases for the on-disk audio cache."""
+
+    def test_youtube_video_id(self):
+        assert youtube_video_id("https://www.youtube.com/watch?v=WRvWLWfv4Ts&t=1") == "WRvWLWfv4Ts"
+        assert youtube_video_id("https://youtu.be/WRvWLWfv4Ts?si=x") == "WRvWLWfv4Ts"
+        assert youtube_video_id("https://www.youtube.com/shorts/WRvWLWfv4Ts") == "WRvWLWfv4Ts"
+        assert youtube_video_id("https://music.youtube.com/watch?v=WRvWLWfv4Ts&list=x") == "WRvWLWfv4Ts"
+        assert youtube_video_id("https://www.youtube-nocookie.com/embed/WRvWLWfv4Ts") == "WRvWLWfv4Ts"
+        assert youtube_video_id("https://example.com/video") is None
+        assert youtube_video_id("https://example.com/watch?v=WRvWLWfv4Ts") is None
+        assert youtube_video_id("https://player.example/embed/WRvWLWfv4Ts") is None
+        assert youtube_video_id("https://notyoutube.com/watch?v=WRvWLWfv4Ts") is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        source = tmp_path / "source.mp3"
+        source.write_bytes(b"x" * 10)
+        cache = _AudioCache(tmp_path / "cache", max_bytes=25)
+
+        cache.put("aaaaaaaaaaa.mp3", source, "A.mp3")
+        cache.put("bbbbbbbbbbb.mp3", source, "B.mp3")
+        assert cache.get("aaaaaaaaaaa.mp3") == tmp_path / "cache" / "aaaaaaaaaaa.mp3" / "A.mp3"
+        cache.put("ccccccccccc.mp3", source, "C.mp3")
+
+        assert cache.get("bbbbbbbbbbb.mp3") is None
+        assert not (tmp_path / "cache" / "bbbbbbbbbbb.mp3").exists()
+        assert cache.get("aaaaaaaaaaa.mp3") is not None
+        assert cache.get("ccccccccccc.mp3") is not None
 
-                filename = extractor.extract_audio_to_file(
-                    "https://youtube.com/watch?v=test", output_file, "mp3"
-                )
+    def test_reloads_entries_from_disk(self, tmp_path):
+        source = tmp_path / "source.mp3"
+        source.write_bytes(b"audio")
+        _AudioCache(tmp_path / "cache", max_bytes=1024).put("aaaaaaaaaaa.mp3", source, "A.mp3")
 
-                assert filename == "output.mp3"
-                assert output_file.exists()
+        reloaded = _AudioCache(tmp_path / "cache", max_bytes=1024)
+
+        assert reloaded.get("aaaaaaaaaaa.mp3").read_bytes() == b"audio"
+
+    @patch("app.core.YoutubeDL")
+    def test_unusable_root_disables_cache(self, mock_ydl_class, tmp_path, monkeypatch):
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_bytes(b"")
+        monkeypatch.setenv("YT_AUDIO_CACHE", str(blocker))
+        _audio_cache.cache_clear()
+        try:
+            mock_ydl = _mock_ydl(mock_ydl_class)
+            _simulate_download(mock_ydl, tmp_path / "out" / "Test_Video.mp3")
+
+            output_path, _ = AudioExtractor(output_dir=tmp_path / "out").extract_audio(
+                "https://youtu.be/WRvWLWfv4Ts", "mp3"
+            )
+
+            assert output_path.read_bytes() == b"audio-bytes"
+            assert _audio_cache() is None
+        finally:
+            _audio_cache.cache_clear()
+
+    def test_invalid_max_size_disables_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("YT_AUDIO_CACHE", str(tmp_path / "cache"))
+        monkeypatch.setenv("YT_AUDIO_CACHE_MAX_MB", "2GB")
+        _audio_cache.cache_clear()
+        try:
+            assert _audio_cache() is None
+        finally:
+            _audio_cache.cache_clear()
+
+    def test_leaves_foreign_directories_alone(self, tmp_path, monkeypatch):
+        foreign = tmp_path / "shared" / "photos" / "2024"
+        foreign.mkdir(parents=True)
+        (foreign / "p.jpg").write_bytes(b"jpg")
+        (tmp_path / "shared" / "yt-audio" / "notes").mkdir(parents=True)
+        monkeypatch.setenv("YT_AUDIO_CACHE", str(tmp_path / "shared"))
+        monkeypatch.setenv("YT_AUDIO_CACHE_MAX_MB", "0")
+        _audio_cache.cache_clear()
+        try:
+            source = tmp_path / "source.mp3"
+            source.write_bytes(b"audio")
+            _audio_cache().put("aaaaaaaaaaa.mp3", source, "A.mp3")
+        finally:
+            _audio_cache.cache_clear()
+
+        assert (foreign / "p.jpg").exists()
+        assert (tmp_path / "shared" / "yt-audio" / "notes").is_dir()
+        assert not (tmp_path / "shared" / "yt-audio" / "aaaaaaaaaaa.mp3").exists()
 
 
 class TestConvenienceFunction:
@@ -140,3 +504,24 @@ class TestConvenienceFunction:
 
             assert mock_extractor.extract_audio.called
             assert filename == "test.mp3"
+
+
+class TestWorkDirs:
+    """Test cases for the shared temp root."""
+
+    def test_stale_work_dirs(self, tmp_path, monkeypatch):
+        """Test that only directories older than the cutoff are reported."""
+        monkeypatch.setattr("app.core.TMP_ROOT", tmp_path)
+        old_dir = tmp_path / "req-old"
+        old_dir.mkdir()
+        os.utime(old_dir, (time.time() - 7200, time.time() - 7200))
+        (tmp_path / "req-new").mkdir()
+        (tmp_path / "stray.txt").write_text("x")
+
+        assert stale_work_dirs(3600) == [old_dir]
+
+    def test_stale_work_dirs_missing_root(self, tmp_path, monkeypatch):
+        """Test that a missing temp root yields nothing."""
+        monkeypatch.setattr("app.core.TMP_ROOT", tmp_path / "missing")
+
+        assert stale_work_dirs(0) == []
@@ -1,12 +1,28 @@
 """
 Unit tests for the MCP server module.
 """
+import asyncio
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from app.mcp_server import extract_audio, extract_audio_to_file, main, run_server
+from app.mcp_server import (
+    _get_extractor,
+    extract_audio,
+    extract_audio_batch,
+    extract_audio_to_file,
+    main,
+    mcp,
+    run_server,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clear_extractor_cache():
+    _get_extractor.cache_clear()
+    yield
+    _get_extractor.cache_clear()
 
 
 class TestMCPServer:
@@ -19,7 +35,7 @@ class TestMCPServer:
         mock_extractor_class.return_value = mock_extractor
         mock_extractor.extract_audio.return_value = (Path("/tmp/test.mp3"), "test.mp3")
 
-        result = extract_audio("https://youtube.com/watch?v=test", "mp3")
+        result = asyncio.run(extract_audio("https://youtube.com/watch?v=test", "mp3"))
 
         assert result["success"] is True
         assert result["filename"] == "test.mp3"
@@ -32,7 +48,7 @@ class TestMCPServer:
         mock_extractor_class.return_value = mock_extractor
         mock_extractor.extract_audio_to_file.return_value = "output.mp3"
 
-        result = extract_audio("https://youtube.com/watch?v=test", "mp3", "/tmp/output.mp3")
+        result = asyncio.run(extract_audio("https://youtube.com/watch?v=test", "mp3", "/tmp/output.mp3"))
 
         assert result["success"] is True
         assert result["filename"] == "output.mp3"
@@ -45,7 +61,7 @@ class TestMCPServer:
         mock_extractor_class.return_value = mock_extractor
         mock_extractor.extract_audio.side_effect = ValueError("Invalid format")
 
-        result = extract_audio("https://youtube.com/watch?v=test", "ogg")
+        result = asyncio.run(extract_audio("https://youtube.com/watch?v=test", "ogg"))
 
         assert result["success"] is False
         assert "error" in result
@@ -58,7 +74,7 @@ class TestMCPServer:
         mock_extractor_class.return_value = mock_extractor
         mock_extractor.extract_audio_to_file.return_value = "output.mp3"
 
-        result = extract_audio_to_file("https://youtube.com/watch?v=test", "/tmp/output.mp3", "mp3")
+        result = asyncio.run(extract_audio_to_file("https://youtube.com/watch?v=test", "/tmp/output.mp3", "mp3"))
 
         assert result["success"] is True
         assert result["filename"] == "output.mp3"
@@ -71,26 +87,92 @@ class TestMCPServer:
         mock_extractor_class.return_value = mock_extractor
         mock_extractor.extract_audio_to_file.side_effect = RuntimeError("Extraction failed")
 
-        result = extract_audio_to_file("https://youtube.com/watch?v=test", "/tmp/output.mp3", "mp3")
+        result = asyncio.run(extract_audio_to_file("https://youtube.com/watch?v=test", "/tmp/output.mp3", "mp3"))
 
         assert result["success"] is False
         assert "error" in result
         assert "Extraction failed" in result["error"]
 
+    @patch("app.mcp_server.AudioExtractor")
+    def test_extract_audio_batch(self, mock_extractor_class):
+        """Test batch extraction returns one result per URL in input order."""
+
+        def extract(url, audio_format):
+            if url.endswith("bad"):
+                raise RuntimeError("boom")
+            return Path(f"/tmp/{url[-1]}.mp3"), f"{url[-1]}.mp3"
+
+        mock_extractor_class.return_value.extract_audio.side_effect = extract
+
+        result = asyncio.run(
+            extract_audio_batch(["https://youtube.com/watch?v=a", "https://youtube.com/watch?v=bad"])
+        )
+
+        first, second = result["results"]
+        assert first == {"success": True, "file_path": "/tmp/a.mp3", "filename": "a.mp3"}
+        assert second["success"] is False
+        assert "Extraction failed" in second["error"]
+        assert mock_extractor_class.call_count == 1
+
+    @patch("app.mcp_server.AudioExtractor")
+    def test_extractor_reused_for_same_options(self, mock_extractor_class):
+        """Test that tool calls with the same connection options share an extractor."""
+        mock_extractor_class.return_value.extract_audio.return_value = (Path("/tmp/test.mp3"), "test.mp3")
+
+        asyncio.run(extract_audio("https://youtube.com/watch?v=a", "mp3", cookies_from_browser="chrome"))
+        asyncio.run(extract_audio("https://youtube.com/watch?v=b", "mp3", cookies_from_browser="chrome"))
+        asyncio.run(extract_audio("https://youtube.com/watch?v=c", "mp3", cookies_from_browser="firefox"))
+
+        assert mock_extractor_class.call_count == 2
+
     def test_run_server_stdio(self):
         """Test stdio transport uses default run."""
         with patch("app.mcp_server.mcp.run") as mock_run:
             run_server("stdio", "127.0.0.1", 8000)
             mock_run.assert_called_once_with()
 
-    def test_run_server_sse(self):
-        """Test SSE transport calls run with transport."""
+    def test_run_server_sse(self, monkeypatch):
+        """Test SSE transport binds host/port and calls run with transport."""
+        monkeypatch.setattr(mcp.settings, "host", mcp.settings.host)
+        monkeypatch.setattr(mcp.settings, "port", mcp.settings.port)
+        monkeypatch.setattr(mcp.settings, "transport_security", mcp.settings.transport_security)
         with patch("app.mcp_server.mcp.run") as mock_run:
             run_server("sse", "0.0.0.0", 8123)
-            mock_run.assert_called_once_with(transport="sse", host="0.0.0.0", port=8123)
+            mock_run.assert_called_once_with(transport="sse")
+        assert mcp.settings.host == "0.0.0.0"
+        assert mcp.settings.port == 8123
+        # A remote bind must not keep the loopback-only Host allow-list.
+        assert mcp.settings.transport_security is None
+
+    def test_run_server_loopback_keeps_dns_rebinding_protection(self, monkeypatch):
+        """Test a loopback bind keeps FastMCP's localhost-only Host allow-list."""
+        monkeypatch.setattr(mcp.settings, "host", mcp.settings.host)
+        monkeypatch.setattr(mcp.settings, "port", mcp.settings.port)
+        monkeypatch.setattr(mcp.settings, "transport_security", None)
+        with patch("app.mcp_server.mcp.run"):
+            run_server("streamable-http", "127.0.0.1", 8125)
+        assert mcp.settings.transport_security.enable_dns_rebinding_protection is True
+        assert "127.0.0.1:*" in mcp.settings.transport_security.allowed_hosts
+
+    def test_run_server_streamable_http(self, monkeypatch):
+        """Test Streamable HTTP transport binds host/port and calls run with transport."""
+        monkeypatch.setattr(mcp.settings, "host", mcp.settings.host)
+        monkeypatch.setattr(mcp.settings, "port", mcp.settings.port)
+        monkeypatch.setattr(mcp.settings, "transport_security", mcp.settings.transport_security)
+        with patch("app.mcp_server.mcp.run") as mock_run:
+            run_server("streamable-http", "0.0.0.0", 8124)
+            mock_run.assert_called_once_with(transport="streamable-http")
+        assert mcp.settings.port == 8124
+
+    def test_run_server_unknown_transport(self):
+        """Test unknown transports are rejected."""
+        with pytest.raises(ValueError, match="Unsupported transport"):
+            run_server("carrier-pigeon", "127.0.0.1", 8000)
 
     def test_main_parses_args(self):
         """Test CLI parsing for transport options."""
-        with patch("app.mcp_server.run_server") as mock_run_server:
+        with patch("app.mcp_server.run_server") as mock_run_server, \
+                patch("app.mcp_server._install_uvloop") as mock_install_uvloop:
             main(["--transport", "sse", "--host", "0.0.0.0", "--port", "9000"])
             mock_run_server.assert_called_once_with("sse", "0.0.0.0", 9000)
+            mock_install_uvloop.assert_called_once_with()